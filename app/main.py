@@ -5,11 +5,14 @@
 #   - db_triggers.py removed; aggregate columns (rating, avg_rating, rating_count)
 #     are now updated in the same Python transaction as the INSERT (see reviews.py)
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 
 from app.database import engine, Base
+from app.services.http import close_client, warm_up
 from app.routers import sites, trips, chat, voice, admin, reviews, amenities
 from app.routers import users, community, stats, insights
 from app.routers import gems, quiz, store, bonus, instants
@@ -58,6 +61,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+_warm_up_task: asyncio.Task | None = None
+
+
+@app.on_event("startup")
+async def _warm_up_http() -> None:
+    # Not awaited — boot (and the health check) must not wait on upstreams.
+    global _warm_up_task
+    _warm_up_task = asyncio.create_task(warm_up())
+
+
+@app.on_event("shutdown")
+async def _close_http_client() -> None:
+    # Stop any warm-up HEADs still in flight before closing their client.
+    if _warm_up_task is not None and not _warm_up_task.done():
+        _warm_up_task.cancel()
+        try:
+            await _warm_up_task
+        except asyncio.CancelledError:
+            pass
+    await close_client()
+
+
 # Core
 app.include_router(users.router)
 app.include_router(sites.router)
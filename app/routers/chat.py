@@ -9,6 +9,7 @@
 #   Node prompt → Site prompt → HeritageSite DB columns → bare minimum
 
 import logging
+from functools import lru_cache
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
@@ -83,13 +84,24 @@ def _get_context_and_level(
     return context, level
 
 
-@router.post("/", response_model=ChatResponse)
-async def chat(req: ChatRequest, db: Session = Depends(get_db)):
+_SYSTEM_RULES = """Rules:
+1. Answer using the heritage context provided below.
+2. If the answer is not in the context, use your general knowledge about this specific site.
+3. Never invent false facts. Never say any historical king or Mughal emperor built this place.
+4. Be engaging, warm, and conversational — like a knowledgeable local guide.
+5. Keep responses to 3-5 sentences unless asked for more detail.
+6. Do not use markdown, asterisks, or bullet points — plain text only.
+7. Address the visitor directly and make them feel welcome.
+"""
 
-    heritage_context, level = _get_context_and_level(db, req.site_id, req.node_id)
 
-    if level.startswith("node:"):
-        node_name = level.split("node:")[1]
+@lru_cache(maxsize=512)
+def _system_prompt_head(node_name: str | None) -> str:
+    """
+    Guide intro + rules block. Depends only on the node the visitor is at
+    (None = site-wide), so it is built once per node instead of per request.
+    """
+    if node_name:
         guide_intro = (
             f"You are SHREE, the AI guide of HUMSAFAR. "
             f"The visitor has scanned the QR and is standing at: {node_name}. "
@@ -101,27 +113,27 @@ async def chat(req: ChatRequest, db: Session = Depends(get_db)):
             "The visitor has just entered this site. "
             "Answer general questions about this place using the context below."
         )
+    return f"{guide_intro}\n\n{_SYSTEM_RULES}"
 
-    system_prompt = f"""{guide_intro}
 
-Rules:
-1. Answer using the heritage context provided below.
-2. If the answer is not in the context, use your general knowledge about this specific site.
-3. Never invent false facts. Never say any historical king or Mughal emperor built this place.
-4. Be engaging, warm, and conversational — like a knowledgeable local guide.
-5. Keep responses to 3-5 sentences unless asked for more detail.
-6. Do not use markdown, asterisks, or bullet points — plain text only.
-7. Address the visitor directly and make them feel welcome.
+@router.post("/", response_model=ChatResponse)
+async def chat(req: ChatRequest, db: Session = Depends(get_db)):
+
+    heritage_context, level = _get_context_and_level(db, req.site_id, req.node_id)
 
+    node_name = level.split("node:")[1] if level.startswith("node:") else None
+    system_prompt = _system_prompt_head(node_name) + f"""
 Heritage Context:
 ------------------
 {heritage_context}
 ------------------
 """
 
-    messages = [{"role": "system", "content": system_prompt}]
-    messages += [{"role": m.role, "content": m.content} for m in req.history]
-    messages.append({"role": "user", "content": req.message})
+    messages = [
+        {"role": "system", "content": system_prompt},
+        *({"role": m.role, "content": m.content} for m in req.history),
+        {"role": "user", "content": req.message},
+    ]
 
     reply = await call_openrouter(messages)
 
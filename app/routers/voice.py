@@ -1,109 +1,264 @@
 # app/routers/voice.py
 
 import logging
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from dataclasses import dataclass
+from urllib.parse import quote
+
+import orjson
+import pybase64
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.models import UserChatHistory
 from app.routers.users import get_user_uuid
 from app.schemas import VoiceChatResponse
 from app.services import voice_orchestrator
+from app.services.voice_orchestrator import Lang
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/voice-chat", tags=["voice"])
 
 
-@router.post("", response_model=VoiceChatResponse)
-async def voice_chat(
-    audio:        UploadFile = File(...,  description="WAV audio from Android AudioRecord"),
-    site_name:    str        = Form(...,  description="Heritage site name"),
-    site_id:      str        = Form(...,  description="Heritage site ID"),
-    language:     str        = Form(...,  description="BCP-47 code e.g. en-IN"),
-    lang_name:    str        = Form(...,  description="ENGLISH | HINDI | HINGLISH"),
-    node_id:      str        = Form("",   description="Optional node ID"),
-    firebase_uid: str        = Form("",   description="Optional — when provided, exchange is persisted to user_chat_history"),
-    trip_id:      str        = Form("",   description="Optional trip ID for chat history correlation"),
-    db:           Session    = Depends(get_db),
-):
+async def _check_audio(audio: UploadFile) -> int:
+    """
+    Validate the upload without buffering it. Returns its size in bytes.
+    The file is rewound so it can be streamed straight into the STT request.
+    """
     if audio.content_type and not audio.content_type.startswith("audio/"):
         raise HTTPException(
             status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
             detail=f"Expected audio/*, received {audio.content_type}",
         )
 
-    audio_bytes = await audio.read()
-    if len(audio_bytes) < 1000:
+    audio.file.seek(0, 2)
+    size = audio.file.tell()
+    audio.file.seek(0)
+    if size < 1000:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Audio too short — minimum ~1 second required",
         )
+    return size
+
+
+@dataclass
+class VoiceRequest:
+    audio:        UploadFile
+    site_name:    str
+    site_id:      str
+    language:     str
+    lang:         Lang
+    node_id_int:  int | None
+    trip_id_int:  int | None
+    firebase_uid: str
+
+
+async def voice_request(
+    request:      Request,
+    audio:        UploadFile = File(...,  description="WAV audio from Android AudioRecord"),
+    site_name:    str        = Form(...,  description="Heritage site name"),
+    site_id:      str        = Form(...,  description="Heritage site ID"),
+    language:     str        = Form(...,  description="BCP-47 code e.g. en-IN"),
+    lang_name:    str        = Form(...,  description="ENGLISH | HINDI | HINGLISH"),
+    node_id:      str        = Form("",   description="Optional node ID"),
+    firebase_uid: str        = Form("",   description="Optional — when provided, exchange is persisted to user_chat_history"),
+    trip_id:      str        = Form("",   description="Optional trip ID for chat history correlation"),
+) -> VoiceRequest:
+    """
+    Form fields shared by every /voice-chat endpoint: validates the audio,
+    parses the optional ids and logs the request.
+    """
+    audio_size = await _check_audio(audio)
 
     node_id_int = int(node_id) if node_id.strip().isdigit() else None
     trip_id_int = int(trip_id) if trip_id.strip().isdigit() else None
 
     logger.info(
-        f"[/voice-chat] site='{site_name}' id={site_id} node={node_id_int} "
-        f"lang={lang_name}({language}) audio={len(audio_bytes)}B"
+        f"[{request.url.path}] site='{site_name}' id={site_id} node={node_id_int} "
+        f"lang={lang_name}({language}) audio={audio_size}B"
+    )
+
+    return VoiceRequest(
+        audio        = audio,
+        site_name    = site_name,
+        site_id      = site_id,
+        language     = language,
+        lang         = Lang.parse(lang_name),
+        node_id_int  = node_id_int,
+        trip_id_int  = trip_id_int,
+        firebase_uid = firebase_uid,
     )
 
+
+def _ndjson_line(obj: dict) -> bytes:
+    return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def _pipeline_http_error(exc: RuntimeError) -> HTTPException:
+    msg = str(exc)
+    logger.error(f"[/voice-chat] Pipeline failed: {msg}")
+    if   msg.startswith("STT_FAILED"):    return HTTPException(status.HTTP_502_BAD_GATEWAY,          detail=msg)
+    elif msg.startswith("LLM_FAILED"):    return HTTPException(status.HTTP_502_BAD_GATEWAY,          detail=msg)
+    elif msg.startswith("TTS_FAILED"):    return HTTPException(status.HTTP_502_BAD_GATEWAY,          detail=msg)
+    elif msg.startswith("STAGE_TIMEOUT"): return HTTPException(status.HTTP_504_GATEWAY_TIMEOUT,      detail=msg)
+    else:                                 return HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail=msg)
+
+
+def _save_exchange(
+    db:        Session,
+    req:       VoiceRequest,
+    user_text: str,
+    bot_text:  str,
+) -> None:
+    """
+    Write the user + assistant turns to user_chat_history.
+    Skipped silently when no firebase_uid is provided OR the user is not
+    registered yet — voice must never fail because of analytics writes.
+    """
+    if not req.firebase_uid.strip():
+        return
+    try:
+        user_uuid = get_user_uuid(req.firebase_uid.strip(), db)
+        site_id_int = int(req.site_id) if str(req.site_id).strip().isdigit() else None
+        if site_id_int is not None:
+            db.add_all([
+                UserChatHistory(
+                    user_id   = user_uuid,
+                    trip_id   = req.trip_id_int,
+                    site_id   = site_id_int,
+                    node_id   = req.node_id_int,
+                    role      = "user",
+                    content   = user_text,
+                    lang_code = req.language,
+                ),
+                UserChatHistory(
+                    user_id   = user_uuid,
+                    trip_id   = req.trip_id_int,
+                    site_id   = site_id_int,
+                    node_id   = req.node_id_int,
+                    role      = "assistant",
+                    content   = bot_text,
+                    lang_code = req.language,
+                ),
+            ])
+            db.commit()
+    except HTTPException:
+        db.rollback()
+    except Exception as exc:
+        db.rollback()
+        logger.warning(f"[/voice-chat] user_chat_history write failed: {exc}")
+
+
+async def _run_pipeline(req: VoiceRequest, db: Session) -> voice_orchestrator.PipelineResult:
     try:
         result = await voice_orchestrator.run(
-            audio_bytes   = audio_bytes,
-            site_name     = site_name,
-            site_id       = site_id,
-            language_code = language,
-            lang_name     = lang_name.upper(),
-            node_id       = node_id_int,
+            audio         = req.audio.file,
+            site_name     = req.site_name,
+            site_id       = req.site_id,
+            language_code = req.language,
+            lang          = req.lang,
+            node_id       = req.node_id_int,
             db            = db,
         )
     except RuntimeError as exc:
-        msg = str(exc)
-        logger.error(f"[/voice-chat] Pipeline failed: {msg}")
-        if   msg.startswith("STT_FAILED"): raise HTTPException(status.HTTP_502_BAD_GATEWAY,           detail=msg)
-        elif msg.startswith("LLM_FAILED"): raise HTTPException(status.HTTP_502_BAD_GATEWAY,           detail=msg)
-        elif msg.startswith("TTS_FAILED"): raise HTTPException(status.HTTP_502_BAD_GATEWAY,           detail=msg)
-        else:                              raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR,  detail=msg)
+        raise _pipeline_http_error(exc)
 
     # Persist the voice exchange to user_chat_history (best-effort).
-    # Skipped silently when no firebase_uid is provided OR the user is not
-    # registered yet — voice must never fail because of analytics writes.
-    if firebase_uid.strip():
-        try:
-            user_uuid = get_user_uuid(firebase_uid.strip(), db)
-            site_id_int = int(site_id) if str(site_id).strip().isdigit() else None
-            if site_id_int is not None:
-                db.add_all([
-                    UserChatHistory(
-                        user_id   = user_uuid,
-                        trip_id   = trip_id_int,
-                        site_id   = site_id_int,
-                        node_id   = node_id_int,
-                        role      = "user",
-                        content   = result.user_text,
-                        lang_code = language,
-                    ),
-                    UserChatHistory(
-                        user_id   = user_uuid,
-                        trip_id   = trip_id_int,
-                        site_id   = site_id_int,
-                        node_id   = node_id_int,
-                        role      = "assistant",
-                        content   = result.bot_text,
-                        lang_code = language,
-                    ),
-                ])
-                db.commit()
-        except HTTPException:
-            db.rollback()
-        except Exception as exc:
-            db.rollback()
-            logger.warning(f"[/voice-chat] user_chat_history write failed: {exc}")
+    _save_exchange(db, req, result.user_text, result.bot_text)
+    return result
+
+
+@router.post("", response_model=VoiceChatResponse)
+async def voice_chat(
+    req: VoiceRequest = Depends(voice_request),
+    db:  Session      = Depends(get_db),
+):
+    result = await _run_pipeline(req, db)
 
     return VoiceChatResponse(
         user_text    = result.user_text,
         bot_text     = result.bot_text,
         audio_base64 = result.audio_base64,
         audio_format = "wav",
-    )
\ No newline at end of file
+    )
+
+
+@router.post("/binary")
+async def voice_chat_binary(
+    req: VoiceRequest = Depends(voice_request),
+    db:  Session      = Depends(get_db),
+):
+    """
+    Same pipeline as /voice-chat, but the body is the raw audio/wav reply
+    instead of base64 inside JSON (~33% smaller, no encode step, playable
+    as soon as the first bytes arrive). The transcript and reply text are
+    URL-encoded in the X-User-Text / X-Bot-Text headers.
+    """
+    result = await _run_pipeline(req, db)
+
+    return Response(
+        content    = result.audio_bytes,
+        media_type = "audio/wav",
+        headers    = {
+            "X-User-Text": quote(result.user_text),
+            "X-Bot-Text":  quote(result.bot_text),
+        },
+    )
+
+
+@router.post("/stream")
+async def voice_chat_stream(
+    req: VoiceRequest = Depends(voice_request),
+    db:  Session      = Depends(get_db),
+):
+    """
+    Streaming variant of /voice-chat. Audio for the first sentence is sent
+    while the LLM is still writing the rest. Response is newline-delimited
+    JSON, one object per line:
+      {"type": "transcript", "user_text": ...}
+      {"type": "audio", "index": n, "text": ..., "audio_base64": ..., "audio_format": "wav"}
+      {"type": "done", "bot_text": ...}
+    or {"type": "error", "detail": "LLM_FAILED: ..."} if a later stage fails.
+    STT failures are still returned as a normal HTTP error.
+    """
+    try:
+        user_text, heritage_context = await voice_orchestrator.stt_with_context(
+            req.audio.file, req.language, req.site_name, req.site_id, req.node_id_int, db,
+        )
+    except RuntimeError as exc:
+        raise _pipeline_http_error(exc)
+
+    messages = voice_orchestrator.build_messages(user_text, heritage_context, req.lang)
+
+    async def _ndjson():
+        yield _ndjson_line({"type": "transcript", "user_text": user_text})
+        reply_parts: list[str] = []
+        index = 0
+        try:
+            async for text, wav in voice_orchestrator.stream_reply(messages, req.language, reply_parts):
+                yield _ndjson_line({
+                    "type":         "audio",
+                    "index":        index,
+                    "text":         text,
+                    "audio_base64": pybase64.b64encode(wav).decode("ascii"),
+                    "audio_format": "wav",
+                })
+                index += 1
+        except RuntimeError as exc:
+            logger.error(f"[/voice-chat/stream] Pipeline failed: {exc}")
+            yield _ndjson_line({"type": "error", "detail": str(exc)})
+            return
+
+        bot_text = "".join(reply_parts).strip()
+        yield _ndjson_line({"type": "done", "bot_text": bot_text})
+
+        history_db = SessionLocal()
+        try:
+            _save_exchange(history_db, req, user_text, bot_text)
+        finally:
+            history_db.close()
+
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
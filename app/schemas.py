@@ -3,7 +3,7 @@
 #   image_type/dimensions added to SiteImage and NodeImage responses.
 #   user_id fields now return UUID strings.
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
@@ -152,12 +152,16 @@ class ChatMessage(BaseModel):
     role:    str
     content: str
 
+    class Config:
+        extra  = "ignore"
+        frozen = True
+
 
 class ChatRequest(BaseModel):
     site_id: int
     node_id: Optional[int] = None
     message: str
-    history: List[ChatMessage] = []
+    history: List[ChatMessage] = Field(default_factory=list)
     # Optional persistence fields. When firebase_uid is provided the user's
     # message and the assistant reply are written to user_chat_history.
     # Calls without firebase_uid still work (no DB write) — keeps backwards
@@ -166,10 +170,18 @@ class ChatRequest(BaseModel):
     trip_id:      Optional[int] = None
     lang_code:    Optional[str] = None
 
+    class Config:
+        extra  = "ignore"
+        frozen = True
+
 
 class ChatResponse(BaseModel):
     reply: str
 
+    class Config:
+        extra  = "ignore"
+        frozen = True
+
 
 # ── Voice ─────────────────────────────────────────────────────────────────────
 
@@ -179,6 +191,10 @@ class VoiceChatResponse(BaseModel):
     audio_base64: str
     audio_format: str
 
+    class Config:
+        extra  = "ignore"
+        frozen = True
+
 
 # ── Images ────────────────────────────────────────────────────────────────────
 
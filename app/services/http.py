@@ -0,0 +1,102 @@
+# app/services/http.py
+# One shared httpx.AsyncClient for every outbound API call (OpenRouter,
+# Sarvam STT/TTS). Reusing the client keeps TCP + TLS sessions warm in its
+# connection pool, so a voice turn no longer pays a fresh handshake for each
+# of its three upstream calls.
+#
+# Created on FastAPI startup and closed on shutdown (see app/main.py).
+# get_client() also creates it lazily so scripts that call the services
+# outside the app lifecycle keep working.
+
+import asyncio
+import logging
+
+import httpx
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_TIMEOUT = 60.0
+# httpx drops idle connections after 5 s by default, so voice turns a few
+# seconds apart would still pay DNS + TCP + TLS each time.
+_KEEPALIVE_EXPIRY = 60.0
+
+# Upstream origins connected to at startup so the first user request finds a
+# resolved, TLS-ready connection in the pool.
+_WARM_ORIGINS = ("https://api.sarvam.ai", "https://openrouter.ai")
+
+_client: httpx.AsyncClient | None = None
+
+
+class TransientError(RuntimeError):
+    """Upstream answered 429 or 5xx — the same request may succeed if retried."""
+
+
+def upstream_error(service: str, status_code: int, body: str) -> RuntimeError:
+    cls = TransientError if status_code == 429 or status_code >= 500 else RuntimeError
+    return cls(f"{service} error {status_code}: {body}")
+
+
+# Wraps a single upstream call (not a whole pipeline): 3 attempts with
+# jittered backoff of ~50 ms → 400 ms, only for 429/5xx and failures before
+# the request reached the server. Read timeouts and dropped connections
+# (RemoteProtocolError) are NOT retried — the POST may already have been
+# processed, and /chat has no stage budget to cap 3 × 60 s. The last error
+# is re-raised as-is so stage tagging is unchanged.
+retry_transient = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_random_exponential(multiplier=0.05, max=0.4),
+    retry=retry_if_exception_type((
+        TransientError,
+        httpx.ConnectError,
+        httpx.ConnectTimeout,
+    )),
+    reraise=True,
+)
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(_DEFAULT_TIMEOUT),
+        limits=httpx.Limits(
+            max_keepalive_connections=32,
+            max_connections=64,
+            keepalive_expiry=_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+async def warm_up() -> None:
+    """
+    Best-effort: open one pooled connection per upstream origin (DNS, TCP and
+    TLS done once, off the request path). Failures are only logged.
+    """
+    client = get_client()
+
+    async def _touch(origin: str) -> None:
+        try:
+            await client.head(origin, timeout=5.0)
+        except httpx.HTTPError as exc:
+            logger.warning(f"[http] warm-up of {origin} failed: {exc}")
+
+    await asyncio.gather(*(_touch(o) for o in _WARM_ORIGINS))
@@ -5,15 +5,30 @@
 # (unchanged — __init__.py re-exports it).
 
 import os
+from typing import AsyncIterator
+
 import httpx
+import orjson
 from dotenv import load_dotenv
 
+from app.services.http import get_client, retry_transient, upstream_error
+
 load_dotenv()
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+_OPENROUTER_URL     = "https://openrouter.ai/api/v1/chat/completions"
+_OPENROUTER_MODEL   = "openai/gpt-4o-mini"
 _OPENROUTER_TIMEOUT = 60.0
 
 
+def _headers() -> dict:
+    return {
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type":  "application/json",
+    }
+
+
+@retry_transient
 async def call_openrouter(messages: list) -> str:
     """
     Sends messages to OpenRouter (OpenAI-compatible) and returns the reply text.
@@ -22,21 +37,71 @@ async def call_openrouter(messages: list) -> str:
     if not OPENROUTER_API_KEY:
         raise RuntimeError("OPENROUTER_API_KEY is not set in environment")
 
-    async with httpx.AsyncClient(timeout=_OPENROUTER_TIMEOUT) as client:
-        response = await client.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type":  "application/json",
-            },
-            json={
-                "model":    "openai/gpt-4o-mini",
-                "messages": messages,
-            }
-        )
+    response = await get_client().post(
+        _OPENROUTER_URL,
+        headers=_headers(),
+        content=orjson.dumps({
+            "model":    _OPENROUTER_MODEL,
+            "messages": messages,
+        }),
+        timeout=_OPENROUTER_TIMEOUT,
+    )
 
     if response.status_code != 200:
-        raise RuntimeError(f"OpenRouter error {response.status_code}: {response.text}")
+        raise upstream_error("OpenRouter", response.status_code, response.text)
+
+    data = orjson.loads(response.content)
+    return data["choices"][0]["message"]["content"]
+
+
+async def stream_openrouter(messages: list) -> AsyncIterator[str]:
+    """
+    Same request as call_openrouter but with "stream": true.
+    Yields content deltas as they arrive over SSE so callers can start
+    working on the first sentence before the full reply is done.
+    Raises RuntimeError on non-200 status.
+    """
+    if not OPENROUTER_API_KEY:
+        raise RuntimeError("OPENROUTER_API_KEY is not set in environment")
+
+    response = await _open_stream(messages)
+    try:
+        async for line in response.aiter_lines():
+            # Skip blank keep-alives and ": OPENROUTER PROCESSING" comments
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            choices = orjson.loads(data).get("choices") or [{}]
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
+    finally:
+        await response.aclose()
 
-    data = response.json()
-    return data["choices"][0]["message"]["content"]
\ No newline at end of file
+
+@retry_transient
+async def _open_stream(messages: list) -> httpx.Response:
+    """
+    Sends the streaming request and checks its status. Only this part is
+    retried — once tokens have been yielded a retry would duplicate them.
+    """
+    client = get_client()
+    request = client.build_request(
+        "POST",
+        _OPENROUTER_URL,
+        headers=_headers(),
+        content=orjson.dumps({
+            "model":    _OPENROUTER_MODEL,
+            "messages": messages,
+            "stream":   True,
+        }),
+        timeout=_OPENROUTER_TIMEOUT,
+    )
+    response = await client.send(request, stream=True)
+    if response.status_code != 200:
+        body = (await response.aread()).decode(errors="replace")
+        await response.aclose()
+        raise upstream_error("OpenRouter", response.status_code, body)
+    return response
@@ -3,8 +3,11 @@
 
 import os
 import logging
+from typing import BinaryIO
 
-import httpx
+import orjson
+
+from app.services.http import get_client, retry_transient, upstream_error
 
 logger = logging.getLogger(__name__)
 
@@ -13,12 +16,37 @@ STT_URL        = "https://api.sarvam.ai/speech-to-text"
 STT_TIMEOUT    = 60.0   # seconds — generous for free tier
 
 
+class _UploadReader:
+    """
+    read/seek/tell-only view of an upload file. httpx sizes a file body via
+    fileno() when it exists, and on Starlette's SpooledTemporaryFile that
+    call rolls the in-memory spool over to a temp file on disk. Without
+    fileno() httpx falls back to tell/seek and the spool stays in memory.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+
+@retry_transient
 async def transcribe(
-    audio_bytes:   bytes,
+    audio:         bytes | BinaryIO,
     language_code: str,   # BCP-47, e.g. "en-IN", "hi-IN"
 ) -> str:
     """
-    Sends WAV bytes to Sarvam STT and returns the transcript.
+    Sends WAV audio to Sarvam STT and returns the transcript.
+    `audio` may be raw bytes or a binary file object (e.g. UploadFile.file);
+    file objects are read straight into the multipart body (no separate
+    bytes copy), without forcing an in-memory upload out to disk.
 
     Sarvam STT request:
       POST https://api.sarvam.ai/speech-to-text
@@ -36,25 +64,30 @@ async def transcribe(
     if not SARVAM_API_KEY:
         raise RuntimeError("SARVAM_API_KEY is not set in environment")
 
-    logger.info(f"[STT] Sending {len(audio_bytes)} bytes, lang={language_code}")
+    if isinstance(audio, (bytes, bytearray)):
+        logger.info(f"[STT] Sending {len(audio)} bytes, lang={language_code}")
+    else:
+        audio.seek(0)
+        audio = _UploadReader(audio)
+        logger.info(f"[STT] Streaming audio file, lang={language_code}")
 
-    async with httpx.AsyncClient(timeout=STT_TIMEOUT) as client:
-        response = await client.post(
-            STT_URL,
-            headers={"api-subscription-key": SARVAM_API_KEY},
-            files={"file": ("recording.wav", audio_bytes, "audio/wav")},
-            data={
-                "language_code":    language_code,
-                "model":            "saarika:v2.5",
-                "with_timestamps":  "false",
-            }
-        )
+    response = await get_client().post(
+        STT_URL,
+        headers={"api-subscription-key": SARVAM_API_KEY},
+        files={"file": ("recording.wav", audio, "audio/wav")},
+        data={
+            "language_code":    language_code,
+            "model":            "saarika:v2.5",
+            "with_timestamps":  "false",
+        },
+        timeout=STT_TIMEOUT,
+    )
 
     if response.status_code != 200:
         logger.error(f"[STT] {response.status_code}: {response.text}")
-        raise RuntimeError(f"Sarvam STT error {response.status_code}: {response.text}")
+        raise upstream_error("Sarvam STT", response.status_code, response.text)
 
-    body       = response.json()
+    body       = orjson.loads(response.content)
     transcript = body.get("transcript", "").strip()
 
     if not transcript:
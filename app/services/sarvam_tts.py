@@ -1,9 +1,17 @@
 # app/services/sarvam_tts.py
 
 import os
-import base64
+import asyncio
+import hashlib
 import logging
-import httpx
+from collections import OrderedDict
+from pathlib import Path
+
+import orjson
+import pybase64
+
+from app.services.http import get_client, retry_transient, upstream_error
+from app.services.tts_batcher import TTSBatcher
 
 logger = logging.getLogger(__name__)
 
@@ -15,26 +23,125 @@ MAX_TTS_CHARS  = 500
 TTS_MODEL      = os.getenv("SARVAM_TTS_MODEL", "bulbul:v3")
 TTS_SPEAKER    = os.getenv("SARVAM_TTS_SPEAKER", "ritu")
 
-
-async def synthesize(
-    text: str,
-    language_code: str,
-    speaker: str | None = None,
-) -> bytes:
-
-    if not SARVAM_API_KEY:
-        raise RuntimeError("SARVAM_API_KEY is not set in environment")
-
-    if len(text) > MAX_TTS_CHARS:
-        text = text[:MAX_TTS_CHARS].rsplit(" ", 1)[0] + "…"
-        logger.warning(f"[TTS] Text truncated to {len(text)} chars")
-
-    speaker = speaker or TTS_SPEAKER
-
-    logger.info(f"[TTS] Synthesizing {len(text)} chars, lang={language_code}, speaker={speaker}, model={TTS_MODEL}")
+# Identical (model, speaker, language, text) always yields the same audio, so
+# repeated bot replies skip Sarvam entirely. Small in-process LRU in front of
+# a hashed-filename disk cache (point SARVAM_TTS_CACHE_DIR at tmpfs if you can).
+# Both tiers are capped by total bytes, not entry count — one cached reply
+# is ~1 MB of WAV.
+TTS_CACHE_DIR          = Path(os.getenv("SARVAM_TTS_CACHE_DIR", "/tmp/tts_cache"))
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("SARVAM_TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+# Once the disk cache passes its cap, the least recently used files (by
+# mtime, refreshed on each hit) are removed until it is back under 90%.
+TTS_CACHE_DISK_BYTES   = int(os.getenv("SARVAM_TTS_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+
+# Concurrent calls landing within this window share one Sarvam request.
+TTS_BATCH_WINDOW_S = 0.03
+TTS_BATCH_MAX      = int(os.getenv("SARVAM_TTS_BATCH_MAX", "3"))
+
+# Memory holds Sarvam's base64 string (what the JSON voice response needs);
+# disk holds the decoded WAV.
+_memory_cache: "OrderedDict[str, str]" = OrderedDict()
+_memory_bytes = 0
+# Running size of the disk cache; None until the first sweep has measured it.
+_disk_bytes: int | None = None
+# Background disk writes; referenced here so they aren't garbage-collected.
+_pending_writes: set[asyncio.Task] = set()
+
+
+def _cache_key(text: str, language_code: str, speaker: str) -> str:
+    # Cache key, not a security boundary: 128-bit BLAKE2b is faster than SHA-256
+    # on these short inputs and still collision-safe at this scale.
+    return hashlib.blake2b(
+        f"{TTS_MODEL}|{speaker}|{language_code}|{text}".encode(), digest_size=16,
+    ).hexdigest()
+
+
+def _memory_get(key: str) -> str | None:
+    audio_b64 = _memory_cache.get(key)
+    if audio_b64 is not None:
+        _memory_cache.move_to_end(key)
+    return audio_b64
+
+
+def _memory_put(key: str, audio_b64: str) -> None:
+    global _memory_bytes
+    if len(audio_b64) > TTS_CACHE_MEMORY_BYTES:
+        return
+    old = _memory_cache.pop(key, None)
+    if old is not None:
+        _memory_bytes -= len(old)
+    _memory_cache[key] = audio_b64
+    _memory_bytes += len(audio_b64)
+    while _memory_bytes > TTS_CACHE_MEMORY_BYTES:
+        _, evicted = _memory_cache.popitem(last=False)
+        _memory_bytes -= len(evicted)
+
+
+# The _disk_* helpers block on file I/O — call them via asyncio.to_thread.
+def _disk_get(key: str) -> bytes | None:
+    path = TTS_CACHE_DIR / f"{key}.wav"
+    try:
+        wav = path.read_bytes()
+        os.utime(path)
+        return wav
+    except OSError:
+        return None
+
+
+def _disk_put(key: str, wav: bytes) -> None:
+    global _disk_bytes
+    try:
+        TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = TTS_CACHE_DIR / f"{key}.wav.tmp"
+        tmp.write_bytes(wav)
+        tmp.replace(TTS_CACHE_DIR / f"{key}.wav")
+    except OSError as exc:
+        logger.warning(f"[TTS] Disk cache write failed: {exc}")
+        return
+
+    if _disk_bytes is not None:
+        _disk_bytes += len(wav)
+    if _disk_bytes is None or _disk_bytes > TTS_CACHE_DISK_BYTES:
+        _disk_sweep()
+
+
+def _disk_sweep() -> None:
+    global _disk_bytes
+    try:
+        entries = []
+        for path in TTS_CACHE_DIR.glob("*.wav"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        if total > TTS_CACHE_DISK_BYTES:
+            target  = TTS_CACHE_DISK_BYTES * 9 // 10
+            removed = 0
+            entries.sort()
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total   -= size
+                removed += 1
+            logger.info(f"[TTS] Disk cache swept {removed} files")
+        _disk_bytes = total
+    except OSError as exc:
+        logger.warning(f"[TTS] Disk cache sweep failed: {exc}")
+
+
+@retry_transient
+async def _request_batch(group_key: tuple[str, str], texts: list[str]) -> list[str]:
+    """
+    One Sarvam call for every text sharing (language_code, speaker).
+    Returns the base64 WAV strings exactly as Sarvam sent them.
+    """
+    language_code, speaker = group_key
 
     payload = {
-        "inputs":               [text],
+        "inputs":               texts,
         "target_language_code": language_code,
         "speaker":              speaker,
         "model":                TTS_MODEL,
@@ -50,25 +157,76 @@ async def synthesize(
             "enable_preprocessing": True,
         })
 
-    async with httpx.AsyncClient(timeout=TTS_TIMEOUT) as client:
-        response = await client.post(
-            TTS_URL,
-            headers={
-                "api-subscription-key": SARVAM_API_KEY,
-                "Content-Type": "application/json",
-            },
-            json=payload,
-        )
+    response = await get_client().post(
+        TTS_URL,
+        headers={
+            "api-subscription-key": SARVAM_API_KEY,
+            "Content-Type": "application/json",
+        },
+        content=orjson.dumps(payload),
+        timeout=TTS_TIMEOUT,
+    )
 
     if response.status_code != 200:
         logger.error(f"[TTS] {response.status_code}: {response.text}")
-        raise RuntimeError(f"Sarvam TTS error {response.status_code}: {response.text}")
+        raise upstream_error("Sarvam TTS", response.status_code, response.text)
 
-    audios = response.json().get("audios", [])
+    audios = orjson.loads(response.content).get("audios", [])
     if not audios:
         raise RuntimeError("Sarvam TTS returned empty audio list")
 
-    wav_bytes = base64.b64decode(audios[0])
+    return audios
+
+
+_batcher = TTSBatcher(
+    _request_batch,
+    max_size=TTS_BATCH_MAX,
+    window_s=TTS_BATCH_WINDOW_S,
+)
+
+
+async def synthesize(
+    text: str,
+    language_code: str,
+    speaker: str | None = None,
+    as_base64: bool = False,
+) -> bytes | str:
+    """
+    Returns WAV bytes, or with as_base64=True the base64 string Sarvam
+    returned — callers that only re-encode for JSON skip a decode/encode.
+    """
+
+    if not SARVAM_API_KEY:
+        raise RuntimeError("SARVAM_API_KEY is not set in environment")
+
+    if len(text) > MAX_TTS_CHARS:
+        text = text[:MAX_TTS_CHARS].rsplit(" ", 1)[0] + "…"
+        logger.warning(f"[TTS] Text truncated to {len(text)} chars")
+
+    speaker = speaker or TTS_SPEAKER
+
+    key = _cache_key(text, language_code, speaker)
+    audio_b64 = _memory_get(key)
+    if audio_b64 is not None:
+        logger.info("[TTS] Cache hit (memory)")
+        return audio_b64 if as_base64 else pybase64.b64decode(audio_b64)
+
+    wav_bytes = await asyncio.to_thread(_disk_get, key)
+    if wav_bytes is not None:
+        logger.info(f"[TTS] Cache hit (disk) — {len(wav_bytes)} bytes")
+        audio_b64 = pybase64.b64encode(wav_bytes).decode("ascii")
+        _memory_put(key, audio_b64)
+        return audio_b64 if as_base64 else wav_bytes
+
+    logger.info(f"[TTS] Synthesizing {len(text)} chars, lang={language_code}, speaker={speaker}, model={TTS_MODEL}")
+
+    audio_b64 = await _batcher.submit((language_code, speaker), text)
+    wav_bytes = pybase64.b64decode(audio_b64)
     logger.info(f"[TTS] Synthesized {len(wav_bytes)} bytes")
 
-    return wav_bytes
\ No newline at end of file
+    _memory_put(key, audio_b64)
+    task = asyncio.create_task(asyncio.to_thread(_disk_put, key, wav_bytes))
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
+
+    return audio_b64 if as_base64 else wav_bytes
@@ -0,0 +1,110 @@
+# app/services/tts_batcher.py
+# Micro-batcher for Sarvam TTS. Concurrent /voice-chat turns whose replies
+# are ready within the same short window are sent as ONE request
+# (Sarvam's "inputs" field takes a list), instead of one HTTPS round-trip
+# per user.
+#
+# Requests are grouped by (language_code, speaker) because those are
+# per-request fields in the Sarvam API. A batch is flushed when it reaches
+# max_size or when window_s has passed since its first item arrived; a lone
+# item with nothing else queued is sent straight away, without the wait.
+#
+# If a batch fails with a non-transient error (e.g. a 400 caused by one
+# input), each input is retried on its own so one bad text only fails its
+# own caller.
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable
+
+from app.services.http import TransientError
+
+logger = logging.getLogger(__name__)
+
+# send(group_key, texts) -> one result per text, in the same order
+SendBatch = Callable[[Hashable, list[str]], Awaitable[list]]
+
+
+class TTSBatcher:
+    def __init__(self, send: SendBatch, max_size: int = 3, window_s: float = 0.03):
+        self._send     = send
+        self._max_size = max(1, max_size)
+        self._window_s = window_s
+        self._queue:  asyncio.Queue | None = None
+        self._worker: asyncio.Task | None  = None
+        # In-flight flushes; referenced here so they aren't garbage-collected.
+        self._flushes: set[asyncio.Task] = set()
+
+    async def submit(self, group_key: Hashable, text: str):
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((group_key, text, future))
+        return await future
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._queue  = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch    = [await self._queue.get()]
+            deadline = loop.time() + self._window_s
+            # Let callers that are already runnable enqueue before deciding
+            # whether anyone is there to batch with.
+            await asyncio.sleep(0)
+            while len(batch) < self._max_size and not (len(batch) == 1 and self._queue.empty()):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            groups: dict[Hashable, list] = {}
+            for item in batch:
+                groups.setdefault(item[0], []).append(item)
+            for group_key, items in groups.items():
+                task = asyncio.create_task(self._flush(group_key, items))
+                self._flushes.add(task)
+                task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, group_key: Hashable, items: list) -> None:
+        live = [(text, fut) for _, text, fut in items if not fut.cancelled()]
+        if not live:
+            return
+        texts = [text for text, _ in live]
+        if len(texts) > 1:
+            logger.info(f"[TTS] Batching {len(texts)} inputs for {group_key}")
+        try:
+            results = await self._send_checked(group_key, texts)
+        except TransientError as exc:
+            results = [exc] * len(texts)
+        except Exception as exc:
+            if len(texts) == 1:
+                results = [exc]
+            else:
+                logger.warning(f"[TTS] Batch of {len(texts)} failed ({exc}), retrying inputs one by one")
+                singles = await asyncio.gather(
+                    *(self._send_checked(group_key, [text]) for text in texts),
+                    return_exceptions=True,
+                )
+                results = [r if isinstance(r, BaseException) else r[0] for r in singles]
+
+        for (_, fut), result in zip(live, results):
+            if fut.done():
+                continue
+            if isinstance(result, BaseException):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+    async def _send_checked(self, group_key: Hashable, texts: list[str]) -> list:
+        results = await self._send(group_key, texts)
+        if len(results) != len(texts):
+            raise RuntimeError(
+                f"Sarvam TTS returned {len(results)} audios for {len(texts)} inputs"
+            )
+        return results
@@ -7,37 +7,96 @@
 #     3. HeritageSite summary/history/fun_facts columns (always available)
 #   Voice and text chatbot now use identical knowledge.
 
-import base64
+import asyncio
 import logging
+import os
+import re
+import struct
 from dataclasses import dataclass
+from enum import IntEnum
+from functools import cached_property, lru_cache
+from typing import AsyncIterator, BinaryIO
+
+import pybase64
 
 from app.services.sarvam_stt import transcribe
-from app.services.sarvam_tts import synthesize
-from app.services.openrouter import call_openrouter   # direct import avoids circular dep
+from app.services.sarvam_tts import MAX_TTS_CHARS, synthesize
+from app.services.openrouter import call_openrouter, stream_openrouter   # direct import avoids circular dep
 
 logger = logging.getLogger(__name__)
 
-_LANG_INSTRUCTIONS: dict[str, str] = {
-    "ENGLISH": "Respond in clear, natural English.",
-    "HINDI": (
+
+class Lang(IntEnum):
+    ENGLISH  = 0
+    HINDI    = 1
+    HINGLISH = 2
+
+    @classmethod
+    def parse(cls, name: str) -> "Lang":
+        """Form value → Lang. Unknown names fall back to ENGLISH."""
+        return cls.__members__.get(name.strip().upper(), cls.ENGLISH)
+
+
+# Indexed by Lang
+_LANG_INSTRUCTIONS: tuple[str, str, str] = (
+    "Respond in clear, natural English.",
+    (
         "Respond only in Hindi using Devanagari script. "
         "Use formal but accessible language."
     ),
-    "HINGLISH": (
+    (
         "Respond in Hinglish — a natural mix of Hindi and English "
         "as spoken by urban Indians. Use Roman script for Hindi words. "
         "Example: 'Yeh site bahut historic hai aur iska architecture amazing hai.' "
         "Keep it conversational and friendly."
     ),
-}
+)
+
+
+# Streaming TTS flushes the LLM buffer at a sentence end (incl. Devanagari
+# danda) or once it grows past this many words, whichever comes first.
+# A terminator only counts when whitespace follows it, so "1.5" and "12.30"
+# stay whole; a trailing terminator waits for the next delta or end of stream.
+_SENTENCE_END    = re.compile(r"[.?!।](?=\s)")
+_ABBREVIATIONS   = frozenset({"dr", "mr", "mrs", "ms", "st", "rs", "sr", "jr", "prof", "vs"})
+# "No." is only an abbreviation before a number ("No. 5"); "Say no." ends.
+_NUMBER_PREFIXES = frozenset({"no"})
+_MAX_CHUNK_WORDS = 40
+
+# run() overlaps LLM and TTS by default (stream_reply + stitched audio).
+# Set VOICE_STREAMING_PIPELINE=0 to fall back to one LLM call + one TTS call.
+STREAMING_PIPELINE = os.getenv("VOICE_STREAMING_PIPELINE", "1") != "0"
+
+# Per-stage wall-clock budgets (seconds), retries included. A hung upstream
+# fails the turn with STAGE_TIMEOUT instead of holding the request open.
+_STT_BUDGET_S = 15.0
+_LLM_BUDGET_S = 15.0
+_TTS_BUDGET_S = 15.0
 
 
 @dataclass
 class PipelineResult:
-    user_text:    str
-    bot_text:     str
-    audio_bytes:  bytes
-    audio_base64: str
+    """
+    Reply audio is kept in whichever form TTS produced it (raw WAV from the
+    streaming path, Sarvam's base64 from the single-call path). The other
+    form is only computed if a router actually asks for it.
+    """
+    user_text: str
+    bot_text:  str
+    wav:       bytes | None = None
+    wav_b64:   str | None   = None
+
+    @cached_property
+    def audio_bytes(self) -> bytes:
+        if self.wav is not None:
+            return self.wav
+        return pybase64.b64decode(self.wav_b64)
+
+    @cached_property
+    def audio_base64(self) -> str:
+        if self.wav_b64 is not None:
+            return self.wav_b64
+        return pybase64.b64encode(self.wav).decode("ascii")
 
 
 def _get_heritage_context(db, site_id: int, node_id: int | None, site_name: str) -> str:
@@ -87,42 +146,23 @@ def _get_heritage_context(db, site_id: int, node_id: int | None, site_name: str)
     return "\n".join(parts)
 
 
-async def run(
-    audio_bytes:   bytes,
-    site_name:     str,
-    site_id:       str,          # str from form field — convert to int
-    language_code: str,
-    lang_name:     str,
-    node_id:       int | None = None,
-    db=None,                     # SQLAlchemy Session (optional — skips DB context if None)
-) -> PipelineResult:
-    """
-    Full voice pipeline: STT → LLM → TTS.
-    Pass db=session to get DB-backed heritage context (recommended).
-    Without db, falls back to site_name only (old behaviour).
-    """
-
-    # ── Stage 1: STT ─────────────────────────────────────────────────────
-    logger.info(f"[Pipeline] STT start — {len(audio_bytes)}B lang={language_code}")
+async def stt(audio: bytes | BinaryIO, language_code: str) -> str:
+    """Stage 1. Raises RuntimeError("STT_FAILED: ...") / RuntimeError("STAGE_TIMEOUT: ...")."""
+    logger.info(f"[Pipeline] STT start — lang={language_code}")
     try:
-        user_text = await transcribe(audio_bytes, language_code)
+        async with asyncio.timeout(_STT_BUDGET_S):
+            return await transcribe(audio, language_code)
+    except TimeoutError as exc:
+        raise RuntimeError(f"STAGE_TIMEOUT: STT exceeded {_STT_BUDGET_S:.0f}s") from exc
     except Exception as exc:
         raise RuntimeError(f"STT_FAILED: {exc}") from exc
 
-    # ── Stage 2: LLM ─────────────────────────────────────────────────────
-    lang_instruction = _LANG_INSTRUCTIONS.get(lang_name, _LANG_INSTRUCTIONS["ENGLISH"])
-
-    if db is not None:
-        try:
-            site_id_int = int(site_id)
-            heritage_context = _get_heritage_context(db, site_id_int, node_id, site_name)
-        except Exception as exc:
-            logger.warning(f"[Pipeline] DB context fetch failed: {exc} — using site_name fallback")
-            heritage_context = f"Heritage Site: {site_name}"
-    else:
-        heritage_context = f"Heritage Site: {site_name}"
 
-    system_prompt = f"""You are SHREE, the official AI heritage voice guide of HUMSAFAR.
+@lru_cache(maxsize=16)
+def _system_prompt_head(lang: Lang) -> str:
+    """Persona, language instruction and rules — everything except the context."""
+    lang_instruction = _LANG_INSTRUCTIONS[lang]
+    return f"""You are SHREE, the official AI heritage voice guide of HUMSAFAR.
 
 Language instruction: {lang_instruction}
 
@@ -132,39 +172,279 @@ Rules:
 3. Never invent false facts.
 4. Keep responses to 2-4 sentences — this is a voice interface, not a text essay.
 5. Do NOT use markdown, asterisks, or bullet points — spoken text only.
+"""
+
+
+def fetch_heritage_context(
+    site_name: str,
+    site_id:   str,
+    node_id:   int | None = None,
+    db=None,
+) -> str:
+    """DB-backed heritage context, or a site_name-only fallback. Never raises."""
+    if db is None:
+        return f"Heritage Site: {site_name}"
+    try:
+        return _get_heritage_context(db, int(site_id), node_id, site_name)
+    except Exception as exc:
+        logger.warning(f"[Pipeline] DB context fetch failed: {exc} — using site_name fallback")
+        return f"Heritage Site: {site_name}"
 
+
+async def stt_with_context(
+    audio:         bytes | BinaryIO,
+    language_code: str,
+    site_name:     str,
+    site_id:       str,
+    node_id:       int | None = None,
+    db=None,
+) -> tuple[str, str]:
+    """
+    Stage 1 plus the heritage-context lookup, run concurrently: the DB
+    queries go to a worker thread while STT waits on Sarvam.
+    Returns (user_text, heritage_context). Raises RuntimeError("STT_FAILED: ...").
+    """
+    # return_exceptions so a failed STT still waits for the context thread —
+    # the caller's session must not be closed while that thread is using it.
+    user_text, heritage_context = await asyncio.gather(
+        stt(audio, language_code),
+        asyncio.to_thread(fetch_heritage_context, site_name, site_id, node_id, db),
+        return_exceptions=True,
+    )
+    if isinstance(user_text, BaseException):
+        raise user_text
+    if isinstance(heritage_context, BaseException):
+        logger.warning(f"[Pipeline] Context thread failed: {heritage_context} — using site_name fallback")
+        heritage_context = f"Heritage Site: {site_name}"
+    return user_text, heritage_context
+
+
+def build_messages(user_text: str, heritage_context: str, lang: Lang) -> list[dict]:
+    """System prompt (language + heritage context) followed by the user turn."""
+    system_prompt = _system_prompt_head(lang) + f"""
 Heritage Context:
 ------------------
 {heritage_context}
 ------------------
 """
 
-    messages = [
+    return [
         {"role": "system", "content": system_prompt},
         {"role": "user",   "content": user_text},
     ]
 
-    logger.info(f"[Pipeline] LLM start — userText='{user_text[:60]}'")
-    try:
-        bot_text = await call_openrouter(messages)
-    except Exception as exc:
-        raise RuntimeError(f"LLM_FAILED: {exc}") from exc
 
-    logger.info(f"[Pipeline] LLM done — botText='{bot_text[:60]}'")
+def _split_ready(buf: str) -> tuple[str, str]:
+    """
+    Split the LLM buffer into (ready, rest). ready ends after the last
+    complete sentence, or at the last whitespace once the buffer passes
+    _MAX_CHUNK_WORDS words — never inside a word or number. ready is ""
+    while nothing can be flushed yet.
+    """
+    cut = 0
+    for m in _SENTENCE_END.finditer(buf):
+        prev = buf[:m.start()].split()[-1:]
+        word = prev[0].lstrip("(\"'").lower() if m.group() == "." and prev else ""
+        if word in _ABBREVIATIONS:
+            continue
+        if word in _NUMBER_PREFIXES:
+            after = buf[m.end():].lstrip()
+            if not after or after[0].isdigit():   # wait for / keep the number
+                continue
+        cut = m.end()
+
+    if not cut and len(buf.split()) > _MAX_CHUNK_WORDS:
+        cut = max(buf.rfind(" "), buf.rfind("\n"), buf.rfind("\t"), 0)
+
+    return buf[:cut], buf[cut:]
+
+
+async def stream_reply(
+    messages:      list[dict],
+    language_code: str,
+    reply_parts:   list[str] | None = None,
+) -> AsyncIterator[tuple[str, bytes]]:
+    """
+    Stages 2+3 overlapped: streams LLM tokens and starts a TTS call for each
+    sentence as soon as it is complete, while the LLM keeps generating.
+    Yields (sentence_text, wav_bytes) in reply order. The sentence texts are
+    trimmed for TTS; pass reply_parts to collect the raw LLM deltas and
+    "".join() them for the reply exactly as the model wrote it.
+    As with a single synthesize() call, only the first MAX_TTS_CHARS of the
+    reply are spoken; the rest is still collected into reply_parts.
+    Raises RuntimeError("LLM_FAILED: ...") (also for an empty reply) /
+    RuntimeError("TTS_FAILED: ..."),
+    or RuntimeError("STAGE_TIMEOUT: ...") once the combined LLM+TTS budget
+    is spent (time the caller spends between items counts too).
+    """
+    # Items are (text, tts_task) in order, an exception, or None at the end.
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _produce() -> None:
+        buf    = ""
+        sent   = 0
+        spoken = 0
+
+        async def _send(text: str) -> None:
+            nonlocal sent, spoken
+            chunk = text.strip()
+            if not chunk or spoken >= MAX_TTS_CHARS:
+                return
+            if spoken + len(chunk) > MAX_TTS_CHARS:
+                chunk = chunk[:MAX_TTS_CHARS - spoken].rsplit(" ", 1)[0] + "…"
+                spoken = MAX_TTS_CHARS
+                logger.warning(f"[Pipeline] Reply past {MAX_TTS_CHARS} chars — rest not spoken")
+            else:
+                spoken += len(chunk) + 1
+            await queue.put((chunk, asyncio.create_task(synthesize(chunk, language_code))))
+            sent += 1
+
+        try:
+            async for delta in stream_openrouter(messages):
+                if reply_parts is not None:
+                    reply_parts.append(delta)
+                ready, buf = _split_ready(buf + delta)
+                await _send(ready)
+            await _send(buf)
+            if not sent:
+                raise RuntimeError("empty reply")
+        except Exception as exc:
+            await queue.put(RuntimeError(f"LLM_FAILED: {exc}"))
+        finally:
+            await queue.put(None)
 
-    # ── Stage 3: TTS ─────────────────────────────────────────────────────
-    logger.info(f"[Pipeline] TTS start — {len(bot_text)} chars")
+    budget   = _LLM_BUDGET_S + _TTS_BUDGET_S
+    deadline = asyncio.get_running_loop().time() + budget
+    producer = asyncio.create_task(_produce())
     try:
-        audio_bytes_out = await synthesize(bot_text, language_code)
-    except Exception as exc:
-        raise RuntimeError(f"TTS_FAILED: {exc}") from exc
+        while True:
+            # Timeouts wrap each await only — never a yield to the caller
+            try:
+                async with asyncio.timeout_at(deadline):
+                    item = await queue.get()
+            except TimeoutError as exc:
+                raise RuntimeError(f"STAGE_TIMEOUT: LLM+TTS exceeded {budget:.0f}s") from exc
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            chunk, task = item
+            try:
+                async with asyncio.timeout_at(deadline):
+                    wav = await task
+            except TimeoutError as exc:
+                raise RuntimeError(f"STAGE_TIMEOUT: LLM+TTS exceeded {budget:.0f}s") from exc
+            except Exception as exc:
+                raise RuntimeError(f"TTS_FAILED: {exc}") from exc
+            yield chunk, wav
+    finally:
+        producer.cancel()
+        while not queue.empty():
+            item = queue.get_nowait()
+            if isinstance(item, tuple):
+                item[1].cancel()
+
+
+def _wav_data_span(wav: bytes) -> tuple[int, int]:
+    """(offset, length) of the PCM payload of a WAV's "data" chunk."""
+    if wav[:4] != b"RIFF" or wav[8:12] != b"WAVE":
+        raise ValueError("not a RIFF/WAVE file")
+    pos = 12
+    while pos + 8 <= len(wav):
+        chunk_id = wav[pos:pos + 4]
+        size = struct.unpack_from("<I", wav, pos + 4)[0]
+        if chunk_id == b"data":
+            # Streamed WAVs may carry a placeholder size — trust the bytes we have
+            return pos + 8, min(size, len(wav) - pos - 8)
+        pos += 8 + size + (size & 1)
+    raise ValueError("WAV has no data chunk")
+
+
+def _concat_wav(chunks: list[bytes]) -> bytes:
+    """
+    Join same-format WAV chunks by byte slicing: the first chunk's header is
+    reused, every chunk's PCM payload is copied once, and the RIFF and data
+    sizes are patched in place. No decode, no re-encode.
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+
+    spans = [_wav_data_span(c) for c in chunks]
+    header_len = spans[0][0]
+    data_len = sum(length for _, length in spans)
+
+    out = bytearray(header_len + data_len)
+    out[:header_len] = chunks[0][:header_len]
+    pos = header_len
+    for chunk, (offset, length) in zip(chunks, spans):
+        out[pos:pos + length] = memoryview(chunk)[offset:offset + length]
+        pos += length
+
+    struct.pack_into("<I", out, 4, len(out) - 8)            # RIFF chunk size
+    struct.pack_into("<I", out, header_len - 4, data_len)   # data chunk size
+    return bytes(out)
+
 
-    audio_b64 = base64.b64encode(audio_bytes_out).decode()
-    logger.info(f"[Pipeline] Complete — STT={len(user_text)}c LLM={len(bot_text)}c TTS={len(audio_bytes_out)}B")
+async def run(
+    audio:         bytes | BinaryIO,   # WAV bytes or an open file (UploadFile.file)
+    site_name:     str,
+    site_id:       str,          # str from form field — convert to int
+    language_code: str,
+    lang:          Lang,
+    node_id:       int | None = None,
+    db=None,                     # SQLAlchemy Session (optional — skips DB context if None)
+) -> PipelineResult:
+    """
+    Full voice pipeline: STT → LLM → TTS. By default LLM and TTS overlap
+    per sentence; with VOICE_STREAMING_PIPELINE=0 the reply is generated
+    in full and then synthesized in one TTS call.
+    Pass db=session to get DB-backed heritage context (recommended).
+    Without db, falls back to site_name only (old behaviour).
+    """
+
+    # ── Stage 1: STT (heritage context fetched alongside) ────────────────
+    user_text, heritage_context = await stt_with_context(
+        audio, language_code, site_name, site_id, node_id, db,
+    )
+
+    # ── Stage 2: LLM ─────────────────────────────────────────────────────
+    messages = build_messages(user_text, heritage_context, lang)
+
+    if STREAMING_PIPELINE:
+        # ── Stages 2+3 overlapped: TTS per sentence while the LLM streams ──
+        logger.info(f"[Pipeline] LLM+TTS stream start — userText='{user_text[:60]}'")
+        reply_parts: list[str]   = []
+        wavs:        list[bytes] = []
+        async for _, wav in stream_reply(messages, language_code, reply_parts):
+            wavs.append(wav)
+
+        bot_text = "".join(reply_parts).strip()
+        try:
+            result = PipelineResult(user_text, bot_text, wav=_concat_wav(wavs))
+        except (ValueError, struct.error) as exc:
+            raise RuntimeError(f"TTS_FAILED: could not join audio chunks: {exc}") from exc
+    else:
+        logger.info(f"[Pipeline] LLM start — userText='{user_text[:60]}'")
+        try:
+            async with asyncio.timeout(_LLM_BUDGET_S):
+                bot_text = await call_openrouter(messages)
+        except TimeoutError as exc:
+            raise RuntimeError(f"STAGE_TIMEOUT: LLM exceeded {_LLM_BUDGET_S:.0f}s") from exc
+        except Exception as exc:
+            raise RuntimeError(f"LLM_FAILED: {exc}") from exc
+
+        logger.info(f"[Pipeline] LLM done — botText='{bot_text[:60]}'")
+
+        # ── Stage 3: TTS ─────────────────────────────────────────────────
+        logger.info(f"[Pipeline] TTS start — {len(bot_text)} chars")
+        try:
+            async with asyncio.timeout(_TTS_BUDGET_S):
+                audio_b64 = await synthesize(bot_text, language_code, as_base64=True)
+        except TimeoutError as exc:
+            raise RuntimeError(f"STAGE_TIMEOUT: TTS exceeded {_TTS_BUDGET_S:.0f}s") from exc
+        except Exception as exc:
+            raise RuntimeError(f"TTS_FAILED: {exc}") from exc
+        result = PipelineResult(user_text, bot_text, wav_b64=audio_b64)
 
-    return PipelineResult(
-        user_text    = user_text,
-        bot_text     = bot_text,
-        audio_bytes  = audio_bytes_out,
-        audio_base64 = audio_b64,
-    )
\ No newline at end of file
+    logger.info(f"[Pipeline] Complete — STT={len(user_text)}c LLM={len(bot_text)}c")
+    return result